@@ -1,12 +1,15 @@
 from fastapi import FastAPI, Response, status, HTTPException
 
 from prometheus_client import make_asgi_app, Counter, Gauge, Histogram
+from prometheus_client import REGISTRY, PROCESS_COLLECTOR, PLATFORM_COLLECTOR, GC_COLLECTOR
 from typing import Dict, Any, List
 import aiohttp
 import asyncio
 import os
 import logging
 import json
+import orjson
+from time import monotonic
 from pydantic import BaseModel
 
 app = FastAPI(title="FKS Monitor", description="Monitoring service for FKS ecosystem")
@@ -15,6 +18,14 @@ app = FastAPI(title="FKS Monitor", description="Monitoring service for FKS ecosy
 metrics_app = make_asgi_app()
 app.mount("/metrics", metrics_app)
 
+# Skip process/platform/GC collectors on every scrape unless explicitly enabled
+if os.getenv("PROMETHEUS_DEFAULT_COLLECTORS", "false").lower() != "true":
+    for _collector in (PROCESS_COLLECTOR, PLATFORM_COLLECTOR, GC_COLLECTOR):
+        try:
+            REGISTRY.unregister(_collector)
+        except KeyError:
+            pass  # already unregistered
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -33,8 +44,29 @@ SERVICE_ENDPOINTS = {
     "fks-api": "http://fks-api:8000/health"
 }
 
+# Per-service metric children, bound once instead of on every probe
+_metric_children: Dict[str, Dict[str, Any]] = {}
+
+def bind_service_metrics(service_name: str) -> Dict[str, Any]:
+    """Bind and cache the labelled metric children for a service."""
+    children = {
+        "latency": health_check_latency.labels(service=service_name),
+        "success": health_check_success.labels(service=service_name),
+        "failure": health_check_failure.labels(service=service_name),
+        "status": service_status.labels(service=service_name)
+    }
+    _metric_children[service_name] = children
+    return children
+
+for _service_name in SERVICE_ENDPOINTS:
+    bind_service_metrics(_service_name)
+
 # Store health data
 health_data: Dict[str, Any] = {}
+# Aggregated views, rebuilt and JSON-encoded once per health tick and served as-is
+unhealthy_count = 0
+services_view = orjson.dumps({"service": "fks-monitor", "status": "healthy", "services": {}})
+summary_view = orjson.dumps({"overall_status": "healthy", "services": {}})
 
 # Configuration for dynamic service discovery (placeholder for future implementation)
 SERVICE_DISCOVERY_ENABLED = os.getenv("SERVICE_DISCOVERY", "false").lower() == "true"
@@ -62,16 +94,7 @@ async def readiness_check():
 @app.get("/monitor/services", response_model=Dict[str, Any])
 async def get_services_health():
     """Get aggregated health status of all monitored services."""
-    overall_status = "healthy"
-    for service, data in health_data.items():
-        if data.get("status") != "healthy":
-            overall_status = "degraded"
-            break
-    return {
-        "service": "fks-monitor",
-        "status": overall_status,
-        "services": health_data
-    }
+    return Response(content=services_view, media_type="application/json")
 
 @app.get("/monitor/services/{service_name}", response_model=Dict[str, Any])
 async def get_service_health(service_name: str):
@@ -86,17 +109,7 @@ async def get_service_health(service_name: str):
 @app.get("/monitor/summary", response_model=Dict[str, Any])
 async def get_health_summary():
     """Get a summarized view of all services' health status."""
-    summary = {}
-    for service, data in health_data.items():
-        summary[service] = {
-            "status": data.get("status"),
-            "latency": data.get("latency", 0.0)
-        }
-    overall_status = "healthy" if all(d.get("status") == "healthy" for d in health_data.values()) else "degraded"
-    return {
-        "overall_status": overall_status,
-        "services": summary
-    }
+    return Response(content=summary_view, media_type="application/json")
 
 @app.post("/monitor/register", response_model=Dict[str, str])
 async def register_service(service: ServiceRegistration):
@@ -106,33 +119,35 @@ async def register_service(service: ServiceRegistration):
     if not service_name or not endpoint:
         return {"status": "error", "message": "Missing name or endpoint"}
     SERVICE_ENDPOINTS[service_name] = endpoint
+    bind_service_metrics(service_name)
     logger.info(f"Registered new service: {service_name} at {endpoint}")
     return {"status": "success", "message": f"Registered {service_name}"}
 
 async def fetch_health(service_name: str, endpoint: str) -> Dict[str, Any]:
     """Fetch health data from a service endpoint."""
     health_check_requests.inc()
-    start_time = asyncio.get_event_loop().time()
+    # Discovered services are bound on first probe
+    metrics = _metric_children.get(service_name) or bind_service_metrics(service_name)
+    start_time = monotonic()
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(endpoint, timeout=5) as response:
-                latency = asyncio.get_event_loop().time() - start_time
-                health_check_latency.labels(service=service_name).observe(latency)
-                if response.status == 200:
-                    data = await response.json()
-                    health_check_success.labels(service=service_name).inc()
-                    service_status.labels(service=service_name).set(1)
-                    return {"status": "healthy", "data": data, "latency": latency}
-                else:
-                    health_check_failure.labels(service=service_name).inc()
-                    service_status.labels(service=service_name).set(0)
-                    return {"status": "unhealthy", "error": f"Status code {response.status}", "latency": latency}
+        async with app.state.http_session.get(endpoint) as response:
+            latency = monotonic() - start_time
+            metrics["latency"].observe(latency)
+            if response.status == 200:
+                data = await response.json()
+                metrics["success"].inc()
+                metrics["status"].set(1)
+                return {"status": "healthy", "data": data, "latency": latency}
+            else:
+                metrics["failure"].inc()
+                metrics["status"].set(0)
+                return {"status": "unhealthy", "error": f"Status code {response.status}", "latency": latency}
     except Exception as e:
-        latency = asyncio.get_event_loop().time() - start_time
-        health_check_latency.labels(service=service_name).observe(latency)
+        latency = monotonic() - start_time
+        metrics["latency"].observe(latency)
         logger.error(f"Error fetching health from {endpoint}: {str(e)}")
-        health_check_failure.labels(service=service_name).inc()
-        service_status.labels(service=service_name).set(0)
+        metrics["failure"].inc()
+        metrics["status"].set(0)
         return {"status": "unhealthy", "error": str(e), "latency": latency}
 
 async def discover_services() -> Dict[str, str]:
@@ -140,6 +155,30 @@ async def discover_services() -> Dict[str, str]:
     # Future implementation could query a service registry or use DNS-SD
     return {}
 
+def publish_health_views():
+    """Rebuild the aggregated health views from the latest health data."""
+    global unhealthy_count, services_view, summary_view
+    summary = {}
+    unhealthy = 0
+    for service, data in health_data.items():
+        if data.get("status") != "healthy":
+            unhealthy += 1
+        summary[service] = {
+            "status": data.get("status"),
+            "latency": data.get("latency", 0.0)
+        }
+    overall_status = "healthy" if unhealthy == 0 else "degraded"
+    unhealthy_count = unhealthy
+    services_view = orjson.dumps({
+        "service": "fks-monitor",
+        "status": overall_status,
+        "services": health_data
+    })
+    summary_view = orjson.dumps({
+        "overall_status": overall_status,
+        "services": summary
+    })
+
 async def update_health_data():
     """Periodically update health data from all services."""
     while True:
@@ -148,17 +187,38 @@ async def update_health_data():
             discovered = await discover_services()
             current_endpoints.update(discovered)
             logger.info(f"Discovered services: {list(discovered.keys())}")
+        started = monotonic()
         for service, endpoint in current_endpoints.items():
             health_data[service] = await fetch_health(service, endpoint)
-            logger.info(f"Updated health for {service}: {health_data[service]['status']}")
+        publish_health_views()
+        logger.info(
+            "health tick: %d healthy, %d unhealthy in %.1fms",
+            len(health_data) - unhealthy_count, unhealthy_count, (monotonic() - started) * 1000
+        )
         await asyncio.sleep(30)  # Check every 30 seconds
 
 @app.on_event("startup")
 async def startup_event():
     """Start background tasks on application startup."""
+    # Shared session so every probe reuses pooled keep-alive connections
+    app.state.http_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=4,
+            ttl_dns_cache=300,
+            keepalive_timeout=60
+        ),
+        timeout=aiohttp.ClientTimeout(total=5)
+    )
     asyncio.create_task(update_health_data())
     logger.info("Started background health check task")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the shared HTTP session on application shutdown."""
+    await app.state.http_session.close()
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", 8002)))
+    # "auto" uses uvloop where it is installed (not on Windows) and asyncio otherwise
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", 8002)), loop="auto")
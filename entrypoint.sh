@@ -10,10 +10,8 @@ HOST=${HOST:-0.0.0.0}
 
 echo "Starting ${SERVICE_NAME} on ${HOST}:${SERVICE_PORT}"
 
-# Run the service
-exec uvicorn src.main:app \
-    --host "${HOST}" \
-    --port "${SERVICE_PORT}" \
-    --no-access-log \
-    --log-level info
+export HOST SERVICE_PORT
+
+# Run the service under gunicorn with uvicorn workers (uvloop is picked up automatically)
+exec gunicorn -c gunicorn_conf.py src.main:app
 
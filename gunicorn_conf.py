@@ -0,0 +1,30 @@
+"""
+Gunicorn configuration for FKS Monitor Service.
+Runs the ASGI app under preforked uvicorn workers.
+"""
+
+import os
+
+# Server socket
+_port = os.getenv("SERVICE_PORT", os.getenv("MONITOR_PORT", "8013"))
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{_port}"
+
+# Workers
+# Every worker runs its own collectors (see src.main lifespan): registered
+# services, Prometheus counters and test runs are all per process, so extra
+# workers serve diverging data and duplicate every test command. Keep a
+# single worker unless WEB_CONCURRENCY is set explicitly.
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Recycling a worker restarts its collectors and any running test commands,
+# so it is off unless GUNICORN_MAX_REQUESTS is set; jitter avoids restarting
+# all workers at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+preload_app = True
+
+# Logging (no access log, matching the previous uvicorn flags)
+loglevel = "info"
+accesslog = None
+errorlog = "-"
@@ -0,0 +1,17 @@
+"""
+Shared response helpers.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+
+
+def orjson_response(content: Any, status_code: int = 200) -> Response:
+    """Encode a JSON payload with orjson, skipping response-model validation."""
+    return Response(
+        content=orjson.dumps(content),
+        status_code=status_code,
+        media_type="application/json"
+    )
@@ -6,7 +6,10 @@ from fastapi import APIRouter, Depends, HTTPException
 from typing import Dict, Any
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from fastapi.responses import Response
+from src.core.config import get_settings
 from src.services.metrics_collector import MetricsCollector
+import threading
+import time
 
 # Import getter function to avoid circular import
 def get_metrics_collector():
@@ -18,6 +21,10 @@ def get_metrics_collector():
 
 router = APIRouter()
 
+# Rendered exposition text, reused between scrapes within the TTL
+_cache = {"body": b"", "ts": 0.0, "ttl": get_settings().PROMETHEUS_CACHE_TTL}
+_cache_lock = threading.Lock()
+
 
 @router.get("")
 async def get_all_metrics(
@@ -30,8 +37,14 @@ async def get_all_metrics(
 @router.get("/prometheus")
 async def prometheus_metrics() -> Response:
     """Prometheus-compatible metrics endpoint."""
+    if time.monotonic() - _cache["ts"] >= _cache["ttl"]:
+        with _cache_lock:
+            # Re-check so concurrent scrapes render only once
+            if time.monotonic() - _cache["ts"] >= _cache["ttl"]:
+                _cache["body"] = generate_latest()
+                _cache["ts"] = time.monotonic()
     return Response(
-        content=generate_latest(),
+        content=_cache["body"],
         media_type=CONTENT_TYPE_LATEST
     )
 
@@ -3,9 +3,11 @@ Service monitoring endpoints.
 """
 
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import Response
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel
 
+from src.api.responses import orjson_response
 from src.services.health_collector import HealthCollector
 
 # Import getter function to avoid circular import
@@ -32,13 +34,13 @@ class ServiceRegistration(BaseModel):
 @router.get("")
 async def list_services(
     health_collector: HealthCollector = Depends(get_health_collector)
-) -> Dict[str, Any]:
+) -> Response:
     """List all monitored services with their health status."""
     all_health = health_collector.get_all_health()
-    return {
+    return orjson_response({
         "services": all_health,
         "count": len(all_health)
-    }
+    })
 
 
 @router.get("/{service_name}")
@@ -79,16 +81,14 @@ async def register_service(
     health_collector: HealthCollector = Depends(get_health_collector)
 ) -> Dict[str, Any]:
     """Register a new service for monitoring."""
-    service_config = {
+    service_config = health_collector.register_service(registration.name, {
         "name": registration.name,
         "health_url": registration.health_url,
-        "ready_url": registration.ready_url or registration.health_url.replace("/health", "/ready"),
-        "live_url": registration.live_url or registration.health_url.replace("/health", "/live"),
+        "ready_url": registration.ready_url,
+        "live_url": registration.live_url,
         "port": registration.port,
         "metrics_url": registration.metrics_url
-    }
-    
-    health_collector.register_service(registration.name, service_config)
+    })
     
     return {
         "status": "registered",
@@ -24,8 +24,9 @@ async def get_all_tests(
     test_collector: TestCollector = Depends(get_test_collector)
 ) -> Dict[str, Any]:
     """Get all test results."""
+    tests = test_collector.get_all_tests()
     return {
-        "tests": test_collector.get_all_tests(),
-        "count": len(test_collector.get_all_tests())
+        "tests": tests,
+        "count": len(tests)
     }
 
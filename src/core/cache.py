@@ -0,0 +1,49 @@
+"""
+Response caching helpers for FKS Monitor Service.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass
+class SummaryCache:
+    """Caches a computed summary until the source data generation changes.
+
+    Entries are also expired after ``ttl`` seconds so a stalled collector
+    never serves a summary older than that.
+    """
+
+    ttl: float = 5.0
+    data: Optional[Dict[str, Any]] = None
+    generation: Any = None
+    updated_at: float = 0.0
+
+    def get(self, generation: Any) -> Optional[Dict[str, Any]]:
+        """Return the cached summary if it is still valid for ``generation``."""
+        if (
+            self.data is not None
+            and self.generation == generation
+            and time.monotonic() - self.updated_at < self.ttl
+        ):
+            return self.data
+        return None
+
+    def get_or_compute(
+        self,
+        generation: Any,
+        compute: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Return the cached summary, recomputing it at most once per generation.
+
+        ``compute`` is synchronous, so no other request can interleave between
+        the lookup and the store on the event loop; no lock is needed.
+        """
+        data = self.get(generation)
+        if data is None:
+            data = compute()
+            self.data = data
+            self.generation = generation
+            self.updated_at = time.monotonic()
+        return data
@@ -4,7 +4,15 @@ Configuration management for FKS Monitor Service.
 
 from pydantic_settings import BaseSettings
 from functools import lru_cache
-from typing import List
+from pathlib import Path
+from typing import Any, Dict, List
+import yaml
+
+try:
+    # libyaml-backed loader, an order of magnitude faster than the pure-Python one
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as YamlLoader
 
 
 class Settings(BaseSettings):
@@ -35,12 +43,17 @@ class Settings(BaseSettings):
     # Prometheus & Grafana
     PROMETHEUS_URL: str = "http://prometheus:9090"
     GRAFANA_URL: str = "http://grafana:3000"
+    PROMETHEUS_CACHE_TTL: float = 5.0  # seconds to reuse rendered /prometheus output
+    PROMETHEUS_DEFAULT_COLLECTORS: bool = False  # export process/platform/GC metrics
     
     # Update Intervals (seconds)
     HEALTH_CHECK_INTERVAL: int = 30
     METRICS_UPDATE_INTERVAL: int = 60
     TEST_CHECK_INTERVAL: int = 300  # 5 minutes
     
+    # Concurrency
+    MAX_CONCURRENT_HEALTH_CHECKS: int = 16
+    
     # Google AI API (for test analysis)
     GOOGLE_AI_API_KEY: str = ""
     
@@ -58,3 +71,9 @@ def get_settings() -> Settings:
     """Get cached settings instance."""
     return Settings()
 
+
+
+def load_yaml(path: Path) -> Dict[str, Any]:
+    """Parse a YAML config file."""
+    with open(path, "rb") as f:
+        return yaml.load(f, Loader=YamlLoader) or {}
@@ -5,12 +5,19 @@ Centralized monitoring service for all FKS services.
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from contextlib import asynccontextmanager
+from prometheus_client import GC_COLLECTOR, PLATFORM_COLLECTOR, PROCESS_COLLECTOR, REGISTRY
 from datetime import datetime
 from typing import Dict, Any, List, Optional
+import aiohttp
+import asyncio
 import logging
 import os
+import sys
 
+from src.api.responses import orjson_response
+from src.core.cache import SummaryCache
 from src.core.config import get_settings
 from src.services.health_collector import HealthCollector
 from src.services.metrics_collector import MetricsCollector
@@ -19,10 +26,16 @@ from src.api.routes import health, services, metrics, tests
 
 logger = logging.getLogger(__name__)
 
+# libuv-based event loop for every asyncio/aiohttp path; must be set before a loop exists
+if sys.platform != "win32":
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
 # Global service instances
 health_collector: Optional[HealthCollector] = None
 metrics_collector: Optional[MetricsCollector] = None
 test_collector: Optional[TestCollector] = None
+summary_cache = SummaryCache()
 
 
 @asynccontextmanager
@@ -33,21 +46,33 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting FKS Monitor Service...")
     settings = get_settings()
+    loop = asyncio.get_running_loop()
+    logger.info(f"Event loop: {type(loop).__module__}.{type(loop).__name__}")
+    
+    # One connection pool and DNS cache shared by the metrics and test collectors
+    app.state.http = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=64, ttl_dns_cache=300)
+    )
     
     # Initialize collectors
     health_collector = HealthCollector(
         services_config=settings.SERVICES_CONFIG,
-        update_interval=settings.HEALTH_CHECK_INTERVAL
+        update_interval=settings.HEALTH_CHECK_INTERVAL,
+        timeout=settings.HEALTH_CHECK_TIMEOUT,
+        max_concurrency=settings.MAX_CONCURRENT_HEALTH_CHECKS
     )
     metrics_collector = MetricsCollector(
         prometheus_url=settings.PROMETHEUS_URL,
         grafana_url=settings.GRAFANA_URL,
-        update_interval=settings.METRICS_UPDATE_INTERVAL
+        update_interval=settings.METRICS_UPDATE_INTERVAL,
+        timeout=settings.METRICS_FETCH_TIMEOUT,
+        session=app.state.http
     )
     test_collector = TestCollector(
         services_config=settings.SERVICES_CONFIG,
         update_interval=settings.TEST_CHECK_INTERVAL,
-        google_ai_key=settings.GOOGLE_AI_API_KEY
+        google_ai_key=settings.GOOGLE_AI_API_KEY,
+        session=app.state.http
     )
     
     # Start background tasks
@@ -67,11 +92,21 @@ async def lifespan(app: FastAPI):
         await metrics_collector.stop()
     if test_collector:
         await test_collector.stop()
+    await app.state.http.close()
     logger.info("FKS Monitor Service stopped")
 
 
 # Create FastAPI app
 settings = get_settings()
+
+# The process/platform/GC collectors are walked on every scrape but say
+# nothing about FKS services; only export them when asked to
+if not settings.PROMETHEUS_DEFAULT_COLLECTORS:
+    for collector in (PROCESS_COLLECTOR, PLATFORM_COLLECTOR, GC_COLLECTOR):
+        try:
+            REGISTRY.unregister(collector)
+        except KeyError:
+            pass  # already unregistered
 app = FastAPI(
     title="FKS Monitor Service",
     description="Centralized monitoring service for FKS platform",
@@ -129,20 +164,30 @@ async def health_redirect() -> Dict[str, Any]:
 
 
 @app.get("/api/v1/summary")
-async def get_summary() -> Dict[str, Any]:
+async def get_summary() -> Response:
     """Get overall system health summary."""
     if not health_collector or not metrics_collector or not test_collector:
         raise HTTPException(status_code=503, detail="Service not initialized")
     
-    # Get aggregated data
-    all_health = health_collector.get_all_health()
-    all_metrics = metrics_collector.get_all_metrics()
-    all_tests = test_collector.get_all_tests()
+    # Only recompute when one of the collectors has published new data
+    generation = (
+        health_collector.generation,
+        metrics_collector.generation,
+        test_collector.generation
+    )
+    return orjson_response(summary_cache.get_or_compute(generation, _build_summary))
+
+
+def _build_summary() -> Dict[str, Any]:
+    """Aggregate collector data into the summary payload."""
+    service_counts = health_collector.get_counts()
+    metric_counts = metrics_collector.get_counts()
+    test_totals = test_collector.get_totals()
     
-    # Calculate summary
-    total_services = len(all_health)
-    healthy_services = sum(1 for h in all_health.values() if h.get("status") == "healthy")
+    total_services = service_counts["total"]
+    healthy_services = service_counts["healthy"]
     unhealthy_services = total_services - healthy_services
+    tested_services = test_totals["services"]
     
     return {
         "timestamp": datetime.utcnow().isoformat(),
@@ -153,14 +198,14 @@ async def get_summary() -> Dict[str, Any]:
             "health_percentage": round((healthy_services / total_services * 100) if total_services > 0 else 0, 2)
         },
         "metrics": {
-            "services_with_metrics": len(all_metrics),
-            "total_metrics": sum(len(m.get("metrics", [])) for m in all_metrics.values())
+            "services_with_metrics": metric_counts["services_with_metrics"],
+            "total_metrics": metric_counts["total_metrics"]
         },
         "tests": {
-            "services_with_tests": len(all_tests),
-            "total_tests": sum(t.get("total_tests", 0) for t in all_tests.values()),
-            "passing_tests": sum(t.get("passing_tests", 0) for t in all_tests.values()),
-            "coverage_avg": round(sum(t.get("coverage", 0) for t in all_tests.values()) / len(all_tests) if all_tests else 0, 2)
+            "services_with_tests": tested_services,
+            "total_tests": test_totals["total_tests"],
+            "passing_tests": test_totals["passing_tests"],
+            "coverage_avg": round(test_totals["coverage_sum"] / tested_services if tested_services else 0, 2)
         }
     }
 
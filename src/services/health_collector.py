@@ -5,15 +5,37 @@ Polls health endpoints from all FKS services and aggregates status.
 
 import asyncio
 import logging
-import yaml
+from collections import Counter
+from operator import itemgetter
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import aiohttp
+import orjson
 import time
+import weakref
+
+from src.core.config import load_yaml
 
 logger = logging.getLogger(__name__)
 
+# Probe kind -> (status on HTTP 200, status otherwise)
+PROBE_STATUSES = {
+    "health": ("healthy", "unhealthy"),
+    "ready": ("ready", "not_ready"),
+    "live": ("alive", "dead"),
+}
+
+
+def normalize_service_config(service_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in ready/live URLs derived from the health URL when not configured."""
+    health_url = service_config["health_url"]
+    return {
+        **service_config,
+        "ready_url": service_config.get("ready_url") or health_url.replace("/health", "/ready"),
+        "live_url": service_config.get("live_url") or health_url.replace("/health", "/live")
+    }
+
 
 class HealthCollector:
     """Collects health status from all FKS services."""
@@ -21,15 +43,30 @@ class HealthCollector:
     def __init__(
         self,
         services_config: str = "/app/config/services.yaml",
-        update_interval: int = 30
+        update_interval: int = 30,
+        timeout: int = 5,
+        max_concurrency: int = 16
     ):
         """Initialize health collector."""
         self.services_config = Path(services_config)
         self.update_interval = update_interval
+        self.timeout = timeout
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
         self.services: Dict[str, Dict[str, Any]] = {}
         self.health_data: Dict[str, Dict[str, Any]] = {}
+        self.generation = 0
+        self.counts = {"healthy": 0, "unhealthy": 0, "degraded": 0, "total": 0}
         self.running = False
         self._task: Optional[asyncio.Task] = None
+        self._stop = asyncio.Event()
+        self._refresh = asyncio.Event()
+        # One session per event loop; a session cannot be used from another loop.
+        # Keyed on a weak reference so a reused id() never matches a dead loop.
+        self._sessions: Dict["weakref.ref[asyncio.AbstractEventLoop]", aiohttp.ClientSession] = {}
+        # Caps how many services are probed at once; like the sessions, a
+        # semaphore binds to the loop it is first used on, so keep one per loop
+        self._max_concurrency = max_concurrency
+        self._semaphores: Dict["weakref.ref[asyncio.AbstractEventLoop]", asyncio.Semaphore] = {}
         
         # Load service configuration
         self._load_services()
@@ -38,16 +75,23 @@ class HealthCollector:
         """Load services from configuration file."""
         if not self.services_config.exists():
             logger.warning(f"Services config not found: {self.services_config}, using defaults")
-            self.services = self._get_default_services()
-            return
+            services = self._get_default_services()
+        else:
+            try:
+                config = load_yaml(self.services_config)
+                services = config.get("services", {})
+            except Exception as e:
+                logger.error(f"Error loading services config: {e}")
+                services = self._get_default_services()
         
-        try:
-            with open(self.services_config, "r") as f:
-                config = yaml.safe_load(f)
-                self.services = config.get("services", {})
-        except Exception as e:
-            logger.error(f"Error loading services config: {e}")
-            self.services = self._get_default_services()
+        self.services = {}
+        for name, service_config in services.items():
+            # Entries without a health URL cannot be probed; skip them rather
+            # than failing the whole config
+            if not isinstance(service_config, dict) or not service_config.get("health_url"):
+                logger.error(f"Skipping service {name}: no health_url configured")
+                continue
+            self.services[name] = normalize_service_config(service_config)
     
     def _get_default_services(self) -> Dict[str, Dict[str, Any]]:
         """Get default FKS services configuration."""
@@ -117,11 +161,81 @@ class HealthCollector:
             }
         }
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the long-lived session for the running event loop, creating it if needed."""
+        loop = asyncio.get_running_loop()
+        key = weakref.ref(loop)
+        session = self._sessions.get(key)
+        if session is not None and not session.closed:
+            return session
+        
+        self._prune_loop_state()
+        # Probes reuse keep-alive connections and the DNS cache across ticks.
+        # Each service gets one pooled socket per concurrent probe kind.
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=0,
+                limit_per_host=len(PROBE_STATUSES),
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            ),
+            timeout=self._timeout
+        )
+        self._sessions[key] = session
+        return session
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the probe concurrency limit for the running event loop."""
+        key = weakref.ref(asyncio.get_running_loop())
+        sem = self._semaphores.get(key)
+        if sem is None:
+            self._prune_loop_state()
+            sem = self._semaphores[key] = asyncio.Semaphore(self._max_concurrency)
+        return sem
+    
+    def _prune_loop_state(self):
+        """Close and drop sessions and semaphores whose event loop is gone or closed."""
+        for key in list(self._semaphores):
+            loop = key()
+            if loop is None or loop.is_closed():
+                del self._semaphores[key]
+        for key, session in list(self._sessions.items()):
+            loop = key()
+            if loop is None or loop.is_closed():
+                # The loop cannot run session.close() any more; closing the
+                # connector synchronously marks the session closed so aiohttp
+                # does not warn about it, and releases the loop reference
+                if not session.closed:
+                    session.connector._close()
+                del self._sessions[key]
+    
+    async def _probe(self, session: aiohttp.ClientSession, url: str, kind: str) -> Dict[str, Any]:
+        """Run a single health, readiness or liveness probe."""
+        ok_status, failed_status = PROBE_STATUSES[kind]
+        started = time.monotonic()
+        try:
+            async with session.get(url) as response:
+                # Time to response headers, measured on our side
+                elapsed_ms = (time.monotonic() - started) * 1000
+                check = {
+                    "status": ok_status if response.status == 200 else failed_status,
+                    "status_code": response.status,
+                    "response_time_ms": round(elapsed_ms, 2)
+                }
+                if kind == "health" and response.status == 200:
+                    check["data"] = orjson.loads(await response.read())
+                return check
+        except Exception as e:
+            return {
+                "status": "error",
+                "error": str(e)
+            }
+    
     async def check_service_health(self, service_name: str, service_config: Dict[str, Any]) -> Dict[str, Any]:
         """Check health of a single service."""
-        health_url = service_config.get("health_url")
-        ready_url = service_config.get("ready_url", health_url.replace("/health", "/ready"))
-        live_url = service_config.get("live_url", health_url.replace("/health", "/live"))
+        health_url = service_config["health_url"]
+        ready_url = service_config["ready_url"]
+        live_url = service_config["live_url"]
         
         result = {
             "service": service_name,
@@ -130,48 +244,19 @@ class HealthCollector:
             "checks": {}
         }
         
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
-            # Check health endpoint
-            try:
-                async with session.get(health_url) as response:
-                    result["checks"]["health"] = {
-                        "status": "healthy" if response.status == 200 else "unhealthy",
-                        "status_code": response.status,
-                        "response_time_ms": round(response.headers.get("X-Response-Time", 0), 2)
-                    }
-                    if response.status == 200:
-                        result["checks"]["health"]["data"] = await response.json()
-            except Exception as e:
-                result["checks"]["health"] = {
-                    "status": "error",
-                    "error": str(e)
-                }
-            
-            # Check readiness endpoint
-            try:
-                async with session.get(ready_url) as response:
-                    result["checks"]["ready"] = {
-                        "status": "ready" if response.status == 200 else "not_ready",
-                        "status_code": response.status
-                    }
-            except Exception as e:
-                result["checks"]["ready"] = {
-                    "status": "error",
-                    "error": str(e)
-                }
-            
-            # Check liveness endpoint
-            try:
-                async with session.get(live_url) as response:
-                    result["checks"]["live"] = {
-                        "status": "alive" if response.status == 200 else "dead",
-                        "status_code": response.status
-                    }
-            except Exception as e:
-                result["checks"]["live"] = {
-                    "status": "error",
-                    "error": str(e)
-                }
+        # Probes are independent, so run them concurrently over the shared session
+        session = self._get_session()
+        async with self._get_semaphore():
+            checks = await asyncio.gather(
+                self._probe(session, health_url, "health"),
+                self._probe(session, ready_url, "ready"),
+                self._probe(session, live_url, "live"),
+                return_exceptions=True
+            )
+        for kind, check in zip(PROBE_STATUSES, checks):
+            if isinstance(check, BaseException):
+                check = {"status": "error", "error": str(check)}
+            result["checks"][kind] = check
         
         # Determine overall status
         health_status = result["checks"].get("health", {}).get("status")
@@ -187,31 +272,83 @@ class HealthCollector:
         
         return result
     
+    async def _check_service_safely(
+        self,
+        service_name: str,
+        service_config: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Check one service, turning unexpected errors into an ``unknown`` result.
+
+        Keeps one bad service from cancelling its siblings in the task group,
+        and never lets a stale result stand in for a check that failed.
+        """
+        try:
+            return await self.check_service_health(service_name, service_config)
+        except Exception as e:
+            logger.error(f"Error checking health of {service_name}: {e}")
+            return {
+                "service": service_name,
+                "status": "unknown",
+                "timestamp": datetime.utcnow().isoformat(),
+                "checks": {},
+                "error": str(e)
+            }
+    
     async def update_all_health(self):
         """Update health status for all services."""
-        tasks = []
-        for service_name, service_config in self.services.items():
-            tasks.append(self.check_service_health(service_name, service_config))
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        started = time.monotonic()
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(self._check_service_safely(service_name, service_config))
+                for service_name, service_config in self.services.items()
+            ]
         
-        for result in results:
-            if isinstance(result, Exception):
-                logger.error(f"Error checking service health: {result}")
-                continue
-            self.health_data[result["service"]] = result
+        # Build the next snapshot aside and publish it with a single assignment,
+        # so readers never see a dict that is still being updated
+        health_data = dict(self.health_data)
+        for task in tasks:
+            result = task.result()
+            health_data[result["service"]] = result
+        self.health_data = health_data
+        self._refresh_counts()
+        self.generation += 1
         
-        logger.debug(f"Updated health for {len(self.health_data)} services")
+        logger.debug(
+            "Updated health for %d services in %.1fms",
+            len(self.health_data), (time.monotonic() - started) * 1000
+        )
+    
+    def _refresh_counts(self):
+        """Recompute status counters from the latest health data."""
+        # map/itemgetter keep the per-service iteration inside C
+        statuses = Counter(map(itemgetter("status"), self.health_data.values()))
+        self.counts = {
+            "healthy": statuses["healthy"],
+            "unhealthy": statuses["unhealthy"],
+            "degraded": statuses["degraded"],
+            "total": len(self.health_data)
+        }
     
     async def _background_task(self):
         """Background task to periodically update health."""
-        while self.running:
+        while not self._stop.is_set():
+            # Wake on the interval, an explicit refresh request, or stop()
+            try:
+                await asyncio.wait_for(self._refresh.wait(), timeout=self.update_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stop.is_set():
+                return
+            self._refresh.clear()
+            
             try:
                 await self.update_all_health()
             except Exception as e:
                 logger.error(f"Error in health update task: {e}")
-            
-            await asyncio.sleep(self.update_interval)
+    
+    def request_refresh(self):
+        """Ask the background task to update now instead of waiting for the interval."""
+        self._refresh.set()
     
     async def start(self):
         """Start the health collector."""
@@ -219,6 +356,9 @@ class HealthCollector:
             return
         
         self.running = True
+        # Fresh events so a restart on another event loop does not reuse loop-bound ones
+        self._stop = asyncio.Event()
+        self._refresh = asyncio.Event()
         # Initial update
         await self.update_all_health()
         # Start background task
@@ -228,24 +368,44 @@ class HealthCollector:
     async def stop(self):
         """Stop the health collector."""
         self.running = False
+        self._stop.set()
+        self._refresh.set()
         if self._task:
-            self._task.cancel()
+            # Let an in-flight update finish; wait_for cancels it if it overruns
             try:
-                await self._task
-            except asyncio.CancelledError:
+                await asyncio.wait_for(self._task, timeout=5)
+            except asyncio.TimeoutError:
                 pass
+            self._task = None
+        # Only this loop's session can be awaited from here; sessions of
+        # closed loops are closed synchronously, and those of other live
+        # loops are left for their own loop to use or prune
+        session = self._sessions.pop(weakref.ref(asyncio.get_running_loop()), None)
+        if session is not None:
+            await session.close()
+        self._prune_loop_state()
         logger.info("Health collector stopped")
     
     def get_all_health(self) -> Dict[str, Dict[str, Any]]:
-        """Get all health data."""
-        return self.health_data.copy()
+        """Get all health data.
+        
+        Returns the published snapshot itself rather than a copy; callers
+        must treat it as read-only.
+        """
+        return self.health_data
+    
+    def get_counts(self) -> Dict[str, int]:
+        """Get status counters from the last update."""
+        return self.counts
     
     def get_service_health(self, service_name: str) -> Optional[Dict[str, Any]]:
         """Get health for a specific service."""
         return self.health_data.get(service_name)
     
-    def register_service(self, service_name: str, service_config: Dict[str, Any]):
-        """Register a new service for monitoring."""
+    def register_service(self, service_name: str, service_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Register a new service for monitoring and return its stored config."""
+        service_config = normalize_service_config(service_config)
         self.services[service_name] = service_config
         logger.info(f"Registered service: {service_name}")
+        return service_config
 
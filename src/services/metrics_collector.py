@@ -5,69 +5,217 @@ Collects metrics from Prometheus and Grafana.
 
 import asyncio
 import logging
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Final, List, Optional, Tuple
 from datetime import datetime
 import aiohttp
+import orjson
+import re
+import time
+import urllib.parse
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on distinct PromQL queries kept in the result cache
+QUERY_CACHE_SIZE = 128
+# Bodies larger than this are decoded in a worker thread
+THREAD_DECODE_BYTES = 64 * 1024
+# Fetches returning more series than this are indexed in a worker thread
+THREAD_INDEX_ITEMS = 5_000
+
+_UNSEEN = object()
+
+
+def _index_result(
+    metric_name: str,
+    items: List[Dict[str, Any]],
+    by_service: Dict[str, Dict[str, List[Dict[str, Any]]]],
+    is_fks_service: Callable[[str], Any]
+) -> int:
+    """Append one query's FKS series to ``by_service``; returns how many were added.
+
+    The prefix check and the per-service series list are resolved once per
+    distinct label value, so each remaining item costs a few dict lookups
+    and one append.
+    """
+    series_for: Dict[str, Optional[List[Dict[str, Any]]]] = {}
+    lookup = series_for.get
+    no_labels: Dict[str, str] = {}
+    added = 0
+    for item in items:
+        labels = item.get("metric", no_labels)
+        service = labels.get("service") or labels.get("name") or labels.get("job")
+        if not service:
+            continue
+        series = lookup(service, _UNSEEN)
+        if series is _UNSEEN:
+            series = series_for[service] = (
+                by_service.setdefault(service, {}).setdefault(metric_name, [])
+                if is_fks_service(service) else None
+            )
+        if series is not None:
+            series.append(item)
+            added += 1
+    return added
+
 
 class MetricsCollector:
     """Collects metrics from Prometheus and Grafana."""
     
+    # Common Prometheus queries for FKS services
+    DEFAULT_QUERIES: Final[Dict[str, str]] = {
+        "http_requests_total": 'sum(rate(http_requests_total[5m])) by (service)',
+        "http_request_duration_seconds": 'sum(rate(http_request_duration_seconds_sum[5m])) by (service)',
+        "service_health": 'up{job=~"fks-.*"}',
+        "cpu_usage": 'sum(rate(container_cpu_usage_seconds_total{name=~"fks-.*"}[5m])) by (name)',
+        "memory_usage": 'sum(container_memory_usage_bytes{name=~"fks-.*"}) by (name)',
+    }
+    
     def __init__(
         self,
         prometheus_url: str = "http://prometheus:9090",
         grafana_url: str = "http://grafana:3000",
-        update_interval: int = 60
+        update_interval: int = 60,
+        timeout: int = 10,
+        session: Optional[aiohttp.ClientSession] = None,
+        queries: Optional[Dict[str, str]] = None
     ):
-        """Initialize metrics collector."""
+        """Initialize metrics collector.
+
+        ``session`` is an application-owned session to share; when omitted the
+        collector opens (and closes) its own. ``queries`` maps metric names to
+        PromQL and defaults to ``DEFAULT_QUERIES``.
+        """
         self.prometheus_url = prometheus_url.rstrip("/")
         self.grafana_url = grafana_url.rstrip("/")
         self.update_interval = update_interval
+        self.timeout = timeout
+        self._queries = queries or self.DEFAULT_QUERIES
+        # Pre-encoded query URLs for the static query set
+        self._prom_endpoint = f"{self.prometheus_url}/api/v1/query"
+        self._query_urls = {
+            query: self._build_query_url(query) for query in self._queries.values()
+        }
         self.metrics_data: Dict[str, Dict[str, Any]] = {}
+        self.generation = 0
+        self.counts = {"services_with_metrics": 0, "total_metrics": 0}
+        # service label -> metric name -> result series, rebuilt every fetch
+        self._by_service: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        # FKS services are labelled fks-<name> (containers/jobs) or fks_<name> (services)
+        self._svc_prefix_re = re.compile(r"^fks[-_]")
         self.running = False
         self._task: Optional[asyncio.Task] = None
+        self._stop = asyncio.Event()
+        self._refresh = asyncio.Event()
+        self._session = session
+        self._owns_session = session is None
+        self._timeout = aiohttp.ClientTimeout(total=timeout, connect=1, sock_read=5)
+        # query -> (fetched_at, result), least recently used first
+        self._query_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._cache_ttl = max(5, update_interval // 2)
+        # Per-query time budget so one slow query cannot stall the update cycle
+        self._query_budget = min(5, update_interval / (len(self._queries) + 1))
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the long-lived Prometheus session, creating it on first use."""
+        if self._owns_session and (self._session is None or self._session.closed):
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=16, keepalive_timeout=75)
+            )
+        return self._session
+    
+    def _build_query_url(self, query: str) -> str:
+        """Build the fully encoded instant-query URL for a PromQL expression."""
+        return f"{self._prom_endpoint}?{urllib.parse.urlencode({'query': query})}"
     
     async def fetch_prometheus_metrics(self, query: str) -> Dict[str, Any]:
         """Fetch metrics from Prometheus."""
-        url = f"{self.prometheus_url}/api/v1/query"
-        params = {"query": query}
+        now = time.monotonic()
+        hit = self._query_cache.get(query)
+        if hit and now - hit[0] < self._cache_ttl:
+            self._query_cache.move_to_end(query)
+            return hit[1]
+        
+        url = self._query_urls.get(query) or self._build_query_url(query)
         
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
-                async with session.get(url, params=params) as response:
+            async with asyncio.timeout(self._query_budget):
+                async with self._get_session().get(url, timeout=self._timeout) as response:
                     if response.status == 200:
-                        return await response.json()
+                        body = await response.read()
+                        if len(body) > THREAD_DECODE_BYTES:
+                            data = await asyncio.to_thread(orjson.loads, body)
+                        else:
+                            data = orjson.loads(body)
+                        self._store_query_result(query, now, data)
+                        return data
                     else:
                         logger.error(f"Prometheus query failed: {response.status}")
                         return {}
+        except TimeoutError:
+            logger.error(f"Prometheus query timed out after {self._query_budget:.1f}s: {query}")
+            return {}
         except Exception as e:
             logger.error(f"Error fetching Prometheus metrics: {e}")
             return {}
     
+    def _store_query_result(self, query: str, fetched_at: float, data: Dict[str, Any]):
+        """Cache a query result, evicting the least recently used entry when full."""
+        self._query_cache[query] = (fetched_at, data)
+        self._query_cache.move_to_end(query)
+        if len(self._query_cache) > QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+    
     async def fetch_all_metrics(self):
         """Fetch metrics for all FKS services."""
-        # Common Prometheus queries for FKS services
-        queries = {
-            "http_requests_total": 'sum(rate(http_requests_total[5m])) by (service)',
-            "http_request_duration_seconds": 'sum(rate(http_request_duration_seconds_sum[5m])) by (service)',
-            "service_health": 'up{job=~"fks-.*"}',
-            "cpu_usage": 'sum(rate(container_cpu_usage_seconds_total{name=~"fks-.*"}[5m])) by (name)',
-            "memory_usage": 'sum(container_memory_usage_bytes{name=~"fks-.*"}) by (name)',
-        }
+        # Queries are independent; overlap their round trips
+        names, qs = zip(*self._queries.items())
+        results = await asyncio.gather(
+            *(self.fetch_prometheus_metrics(query) for query in qs),
+            return_exceptions=True
+        )
         
         metrics = {}
-        for metric_name, query in queries.items():
-            result = await self.fetch_prometheus_metrics(query)
+        for metric_name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching {metric_name} metrics: {result}")
+                continue
             if result:
                 metrics[metric_name] = result
         
+        # Large result sets are indexed off the event loop
+        series = sum(len(data.get("data", {}).get("result", [])) for data in metrics.values())
+        if series > THREAD_INDEX_ITEMS:
+            by_service, counts = await asyncio.to_thread(self._index_metrics, metrics)
+        else:
+            by_service, counts = self._index_metrics(metrics)
+        
+        # Publish the new snapshot, index and counters together
         self.metrics_data = {
             "timestamp": datetime.utcnow().isoformat(),
             "source": "prometheus",
             "metrics": metrics
         }
+        self._by_service = by_service
+        self.counts = counts
+        self.generation += 1
+    
+    def _index_metrics(
+        self,
+        metrics: Dict[str, Any]
+    ) -> Tuple[Dict[str, Dict[str, List[Dict[str, Any]]]], Dict[str, int]]:
+        """Index FKS result series by service label; returns (index, counters).
+
+        Only reads ``metrics`` and builds new objects, so it is safe to run in
+        a worker thread.
+        """
+        by_service: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        is_fks_service = self._svc_prefix_re.match
+        total = 0
+        for metric_name, metric_data in metrics.items():
+            items = metric_data.get("data", {}).get("result", [])
+            total += _index_result(metric_name, items, by_service, is_fks_service)
+        return by_service, {"services_with_metrics": len(by_service), "total_metrics": total}
     
     async def fetch_grafana_dashboards(self) -> List[Dict[str, Any]]:
         """Fetch dashboard data from Grafana."""
@@ -82,13 +230,28 @@ class MetricsCollector:
     
     async def _background_task(self):
         """Background task to periodically update metrics."""
-        while self.running:
+        while not self._stop.is_set():
+            # Wake on the interval, an explicit refresh request, or stop()
+            try:
+                await asyncio.wait_for(self._refresh.wait(), timeout=self.update_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stop.is_set():
+                return
+            self._refresh.clear()
+            
             try:
                 await self.update_all_metrics()
             except Exception as e:
                 logger.error(f"Error in metrics update task: {e}")
-            
-            await asyncio.sleep(self.update_interval)
+    
+    def request_refresh(self):
+        """Ask the background task to update now instead of waiting for the interval.
+
+        Cached query results are dropped so the update really goes to Prometheus.
+        """
+        self._query_cache.clear()
+        self._refresh.set()
     
     async def start(self):
         """Start the metrics collector."""
@@ -96,6 +259,10 @@ class MetricsCollector:
             return
         
         self.running = True
+        # Fresh events so a restart on another event loop does not reuse loop-bound ones
+        self._stop = asyncio.Event()
+        self._refresh = asyncio.Event()
+        self._get_session()
         # Initial update
         await self.update_all_metrics()
         # Start background task
@@ -105,40 +272,40 @@ class MetricsCollector:
     async def stop(self):
         """Stop the metrics collector."""
         self.running = False
+        self._stop.set()
+        self._refresh.set()
         if self._task:
-            self._task.cancel()
+            # Let an in-flight update finish; wait_for cancels it if it overruns
             try:
-                await self._task
-            except asyncio.CancelledError:
+                await asyncio.wait_for(self._task, timeout=5)
+            except asyncio.TimeoutError:
                 pass
+            self._task = None
+        if self._owns_session and self._session:
+            await self._session.close()
+            self._session = None
         logger.info("Metrics collector stopped")
     
     def get_all_metrics(self) -> Dict[str, Dict[str, Any]]:
-        """Get all metrics data."""
-        return self.metrics_data.copy()
+        """Get all metrics data.
+        
+        Returns the published snapshot itself rather than a copy; callers
+        must treat it as read-only.
+        """
+        return self.metrics_data
+    
+    def get_counts(self) -> Dict[str, int]:
+        """Get metric counters from the last update."""
+        return self.counts
     
     def get_service_metrics(self, service_name: str) -> Optional[Dict[str, Any]]:
         """Get metrics for a specific service."""
-        # Extract service-specific metrics from aggregated data
+        # Extract service-specific metrics from the index built at fetch time
         if not self.metrics_data:
             return None
         
-        service_metrics = {}
-        metrics = self.metrics_data.get("metrics", {})
-        
-        for metric_name, metric_data in metrics.items():
-            # Filter metrics for this service
-            if isinstance(metric_data, dict) and "data" in metric_data:
-                service_data = [
-                    item for item in metric_data["data"].get("result", [])
-                    if service_name in str(item)
-                ]
-                if service_data:
-                    service_metrics[metric_name] = service_data
-        
         return {
             "service": service_name,
             "timestamp": self.metrics_data.get("timestamp"),
-            "metrics": service_metrics
+            "metrics": self._by_service.get(service_name, {})
         }
-
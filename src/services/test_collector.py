@@ -5,16 +5,47 @@ Collects test results and coverage from all FKS services.
 
 import asyncio
 import logging
-import yaml
 from pathlib import Path
-from typing import Dict, Any, List, Optional
-from datetime import datetime
-import subprocess
-import json
-import os
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import datetime, timezone
+import aiohttp
+import orjson
+import re
+
+from src.core.config import load_yaml
 
 logger = logging.getLogger(__name__)
 
+# Counts from a pytest summary line, e.g. "12 passed, 1 failed in 3.2s"
+PYTEST_COUNT_RE = re.compile(r"(\d+) (passed|failed|error)")
+# Fields copied from a service's tests endpoint response, with their types
+TEST_RESULT_FIELDS = {
+    "total_tests": int,
+    "passing_tests": int,
+    "failing_tests": int,
+    "coverage": float,
+}
+
+
+def parse_test_results(data: Any) -> Dict[str, Any]:
+    """Validate a tests endpoint payload and return its known fields.
+
+    Raises ValueError for anything that is not a number, so one bad service
+    cannot poison the totals.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Test results must be a JSON object")
+    fields = {}
+    for key, field_type in TEST_RESULT_FIELDS.items():
+        if key not in data:
+            continue
+        value = data[key]
+        # bool is an int subclass but never a valid count
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"Invalid {key} in test results: {value!r}")
+        fields[key] = field_type(value)
+    return fields
+
 
 class TestCollector:
     """Collects test results from all FKS services."""
@@ -23,16 +54,35 @@ class TestCollector:
         self,
         services_config: str = "/app/config/services.yaml",
         update_interval: int = 300,
-        google_ai_key: str = ""
+        google_ai_key: str = "",
+        max_concurrency: int = 8,
+        test_timeout: int = 600,
+        session: Optional[aiohttp.ClientSession] = None
     ):
-        """Initialize test collector."""
+        """Initialize test collector.
+
+        ``session`` is an application-owned session to share; when omitted the
+        collector opens (and closes) its own.
+        """
         self.services_config = Path(services_config)
         self.update_interval = update_interval
         self.google_ai_key = google_ai_key
+        self.test_timeout = test_timeout
         self.services: Dict[str, Dict[str, Any]] = {}
         self.test_data: Dict[str, Dict[str, Any]] = {}
+        self.generation = 0
+        self.totals = {"services": 0, "total_tests": 0, "passing_tests": 0, "coverage_sum": 0.0}
         self.running = False
         self._task: Optional[asyncio.Task] = None
+        self._stop = asyncio.Event()
+        self._refresh = asyncio.Event()
+        self._config_mtime: Optional[int] = None
+        self._session = session
+        self._owns_session = session is None
+        self._timeout = aiohttp.ClientTimeout(total=10)
+        # Caps in-flight test checks so downstream services are not overloaded
+        self._max_concurrency = max_concurrency
+        self._concurrency = asyncio.Semaphore(max_concurrency)
         
         # Load service configuration
         self._load_services()
@@ -42,64 +92,183 @@ class TestCollector:
         if not self.services_config.exists():
             logger.warning(f"Services config not found: {self.services_config}")
             self.services = {}
+            self._config_mtime = None
             return
         
         try:
-            with open(self.services_config, "r") as f:
-                config = yaml.safe_load(f)
-                self.services = config.get("services", {})
+            self._config_mtime = self.services_config.stat().st_mtime_ns
+            config = load_yaml(self.services_config)
+            self.services = config.get("services", {})
         except Exception as e:
             logger.error(f"Error loading services config: {e}")
             self.services = {}
     
-    async def check_service_tests(self, service_name: str, service_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Check test status for a service."""
-        # This would typically check the service's test endpoint or run tests
-        # For now, return a placeholder structure
-        
-        result = {
-            "service": service_name,
-            "timestamp": datetime.utcnow().isoformat(),
-            "total_tests": 0,
-            "passing_tests": 0,
-            "failing_tests": 0,
-            "coverage": 0.0,
-            "status": "unknown"
-        }
-        
-        # In a real implementation, this would:
-        # 1. Check if service has a /tests endpoint
-        # 2. Or run tests in the service's test directory
-        # 3. Parse test results
-        # 4. Get coverage reports
-        
-        return result
+    def _maybe_reload(self):
+        """Re-parse the services config only if the file changed on disk."""
+        try:
+            mtime = self.services_config.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self._config_mtime:
+            logger.info(f"Services config changed, reloading: {self.services_config}")
+            self._load_services()
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared session for test endpoint probes, creating it on first use."""
+        if self._owns_session and (self._session is None or self._session.closed):
+            self._session = aiohttp.ClientSession()
+        return self._session
+    
+    async def _run(self, cmd: List[str], cwd: Optional[str] = None) -> Tuple[int, bytes]:
+        """Run a command without blocking the event loop; returns (exit code, output)."""
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            cwd=cwd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+        try:
+            output, _ = await asyncio.wait_for(process.communicate(), timeout=self.test_timeout)
+        finally:
+            # Timed out or cancelled (e.g. by stop()): never leave the child running
+            if process.returncode is None:
+                try:
+                    process.kill()
+                except ProcessLookupError:
+                    pass
+                await process.wait()
+        return process.returncode, output
+    
+    async def check_service_tests(
+        self,
+        service_name: str,
+        service_config: Dict[str, Any],
+        ts: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Check test status for a service, stamped with the cycle timestamp ``ts``."""
+        async with self._concurrency:
+            result = {
+                "service": service_name,
+                "timestamp": ts or datetime.now(timezone.utc).isoformat(),
+                "total_tests": 0,
+                "passing_tests": 0,
+                "failing_tests": 0,
+                "coverage": 0.0,
+                "status": "unknown"
+            }
+            
+            # Services that publish results expose them on a tests endpoint;
+            # otherwise run the service's test command in its test directory
+            tests_url = service_config.get("tests_url")
+            test_command = service_config.get("test_command")
+            if tests_url:
+                try:
+                    session = self._get_session()
+                    async with session.get(tests_url, timeout=self._timeout) as response:
+                        if response.status == 200:
+                            data = orjson.loads(await response.read())
+                            result.update(parse_test_results(data))
+                            result["status"] = "failing" if result["failing_tests"] else "passing"
+                        else:
+                            result["status"] = "error"
+                            result["error"] = f"Status code {response.status}"
+                except Exception as e:
+                    result["status"] = "error"
+                    result["error"] = str(e)
+            elif test_command and not (
+                isinstance(test_command, list) and all(isinstance(arg, str) for arg in test_command)
+            ):
+                # A YAML string would be splatted into single-character arguments
+                result["status"] = "error"
+                result["error"] = "test_command must be a list of arguments"
+            elif test_command:
+                try:
+                    returncode, output = await self._run(
+                        test_command, cwd=service_config.get("tests_dir")
+                    )
+                    counts = {"passed": 0, "failed": 0, "error": 0}
+                    for count, outcome in PYTEST_COUNT_RE.findall(output.decode(errors="replace")):
+                        counts[outcome] = int(count)
+                    result["passing_tests"] = counts["passed"]
+                    result["failing_tests"] = counts["failed"] + counts["error"]
+                    result["total_tests"] = result["passing_tests"] + result["failing_tests"]
+                    failing = returncode != 0 or result["failing_tests"]
+                    result["status"] = "failing" if failing else "passing"
+                except asyncio.TimeoutError:
+                    result["status"] = "error"
+                    result["error"] = f"Tests timed out after {self.test_timeout}s"
+                except Exception as e:
+                    result["status"] = "error"
+                    result["error"] = str(e)
+            
+            return result
     
     async def update_all_tests(self):
         """Update test results for all services."""
-        tasks = []
-        for service_name, service_config in self.services.items():
-            tasks.append(self.check_service_tests(service_name, service_config))
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        if not self.services:
+            return
+        # One timestamp for the whole cycle
+        ts = datetime.now(timezone.utc).isoformat()
+        tasks = [
+            asyncio.create_task(self.check_service_tests(service_name, service_config, ts=ts))
+            for service_name, service_config in self.services.items()
+        ]
         
-        for result in results:
-            if isinstance(result, Exception):
-                logger.error(f"Error checking service tests: {result}")
-                continue
-            self.test_data[result["service"]] = result
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                try:
+                    result = await next_result
+                except Exception as e:
+                    logger.error(f"Error checking service tests: {e}")
+                    continue
+                # Publish each result as it lands so slow services don't hold back
+                # fast ones; totals and generation move with it so the summary
+                # always matches the published test data
+                self.test_data = {**self.test_data, result["service"]: result}
+                self._refresh_totals()
+                self.generation += 1
+        finally:
+            # If this update is cancelled, cancel the checks still running so
+            # their test commands are killed too
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
         
         logger.debug(f"Updated test results for {len(self.test_data)} services")
     
+    def _refresh_totals(self):
+        """Recompute running test totals in a single pass over test data."""
+        totals = {"services": 0, "total_tests": 0, "passing_tests": 0, "coverage_sum": 0.0}
+        for data in self.test_data.values():
+            totals["services"] += 1
+            totals["total_tests"] += data.get("total_tests", 0)
+            totals["passing_tests"] += data.get("passing_tests", 0)
+            totals["coverage_sum"] += data.get("coverage", 0)
+        self.totals = totals
+    
     async def _background_task(self):
-        """Background task to periodically update tests."""
-        while self.running:
+        """Background task to update tests, starting with an immediate first run."""
+        while not self._stop.is_set():
             try:
+                self._maybe_reload()
                 await self.update_all_tests()
             except Exception as e:
                 logger.error(f"Error in test update task: {e}")
             
-            await asyncio.sleep(self.update_interval)
+            # Wake on the interval, an explicit refresh request, or stop();
+            # with nothing configured only look for a new config occasionally
+            interval = self.update_interval if self.services else self.update_interval * 5
+            try:
+                await asyncio.wait_for(self._refresh.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._refresh.clear()
+    
+    def request_refresh(self):
+        """Ask the background task to update now instead of waiting for the interval."""
+        self._refresh.set()
     
     async def start(self):
         """Start the test collector."""
@@ -107,26 +276,44 @@ class TestCollector:
             return
         
         self.running = True
-        # Initial update
-        await self.update_all_tests()
-        # Start background task
+        # Fresh events and semaphore so a restart on another event loop does
+        # not reuse loop-bound ones
+        self._stop = asyncio.Event()
+        self._refresh = asyncio.Event()
+        self._concurrency = asyncio.Semaphore(self._max_concurrency)
+        # Test suites can run for minutes, so even the first update happens in
+        # the background task rather than holding up application startup
         self._task = asyncio.create_task(self._background_task())
         logger.info("Test collector started")
     
     async def stop(self):
         """Stop the test collector."""
         self.running = False
+        self._stop.set()
+        self._refresh.set()
         if self._task:
-            self._task.cancel()
+            # Let an in-flight update finish; wait_for cancels it if it overruns
             try:
-                await self._task
-            except asyncio.CancelledError:
+                await asyncio.wait_for(self._task, timeout=5)
+            except asyncio.TimeoutError:
                 pass
+            self._task = None
+        if self._owns_session and self._session:
+            await self._session.close()
+            self._session = None
         logger.info("Test collector stopped")
     
     def get_all_tests(self) -> Dict[str, Dict[str, Any]]:
-        """Get all test data."""
-        return self.test_data.copy()
+        """Get all test data.
+        
+        Returns the published snapshot itself rather than a copy; callers
+        must treat it as read-only.
+        """
+        return self.test_data
+    
+    def get_totals(self) -> Dict[str, Any]:
+        """Get test totals from the last update."""
+        return self.totals
     
     def get_service_tests(self, service_name: str) -> Optional[Dict[str, Any]]:
         """Get test results for a specific service."""
@@ -0,0 +1,23 @@
+"""Summary cache tests."""
+from src.core.cache import SummaryCache
+
+
+def test_summary_cache_reuses_same_generation():
+    """Summary is computed once per generation."""
+    cache = SummaryCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"calls": len(calls)}
+
+    assert cache.get_or_compute(1, compute) == {"calls": 1}
+    assert cache.get_or_compute(1, compute) == {"calls": 1}
+    assert cache.get_or_compute(2, compute) == {"calls": 2}
+
+
+def test_summary_cache_expires_after_ttl():
+    """Stale entries are recomputed even if the generation is unchanged."""
+    cache = SummaryCache(ttl=0.0)
+    cache.get_or_compute(1, lambda: {"value": 1})
+    assert cache.get(1) is None
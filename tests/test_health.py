@@ -2,32 +2,29 @@
 import pytest
 from fastapi.testclient import TestClient
 
-# Try to import app - adjust import path as needed
-try:
-    from src.main import app
-    client = TestClient(app)
-except ImportError:
-    # Fallback if app structure is different
-    client = None
 
+@pytest.fixture(scope="session")
+def client():
+    """Test client for the app; the lifespan runs once for the whole session."""
+    main = pytest.importorskip("src.main")
+    with TestClient(main.app) as c:
+        yield c
 
-@pytest.mark.skipif(client is None, reason="App not importable")
-def test_health_endpoint():
+
+def test_health_endpoint(client):
     """Test health endpoint."""
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
 
 
-@pytest.mark.skipif(client is None, reason="App not importable")
-def test_ready_endpoint():
+def test_ready_endpoint(client):
     """Test readiness endpoint."""
     response = client.get("/ready")
     assert response.status_code == 200
 
 
-@pytest.mark.skipif(client is None, reason="App not importable")
-def test_live_endpoint():
+def test_live_endpoint(client):
     """Test liveness endpoint."""
     response = client.get("/live")
     assert response.status_code == 200
@@ -0,0 +1,99 @@
+"""Health collector tests."""
+import asyncio
+
+import pytest
+
+from src.services.health_collector import HealthCollector
+
+
+@pytest.fixture
+def collector(tmp_path):
+    """Health collector using the default service set."""
+    return HealthCollector(services_config=str(tmp_path / "missing.yaml"))
+
+
+@pytest.mark.asyncio
+async def test_update_all_health_refreshes_counts(collector):
+    """Status counters are recomputed once per update."""
+    statuses = ["healthy", "degraded", "unhealthy"]
+
+    async def fake_check(service_name, service_config):
+        index = list(collector.services).index(service_name)
+        return {"service": service_name, "status": statuses[index % 3]}
+
+    collector.check_service_health = fake_check
+    await collector.update_all_health()
+
+    counts = collector.get_counts()
+    assert counts["total"] == len(collector.services)
+    assert counts["healthy"] + counts["degraded"] + counts["unhealthy"] == counts["total"]
+    assert collector.generation == 1
+
+
+@pytest.mark.asyncio
+async def test_update_all_health_reports_unknown_when_every_check_fails(collector):
+    """Failed checks are published as unknown, never counted healthy."""
+    async def failing_check(service_name, service_config):
+        raise RuntimeError("boom")
+
+    collector.check_service_health = failing_check
+    await collector.update_all_health()
+
+    assert {data["status"] for data in collector.get_all_health().values()} == {"unknown"}
+    assert collector.get_counts()["healthy"] == 0
+    assert collector.generation == 1
+
+
+@pytest.mark.asyncio
+async def test_update_all_health_marks_only_the_failing_service(collector):
+    """One service raising replaces its stale entry and keeps the others' results."""
+    bad = next(iter(collector.services))
+    collector.health_data = {bad: {"service": bad, "status": "healthy"}}
+
+    async def check(service_name, service_config):
+        if service_name == bad:
+            raise KeyError("health_url")
+        return {"service": service_name, "status": "healthy"}
+
+    collector.check_service_health = check
+    await collector.update_all_health()
+
+    failed = collector.get_service_health(bad)
+    assert failed["status"] == "unknown"
+    assert "health_url" in failed["error"] and failed["timestamp"]
+    assert collector.get_counts()["healthy"] == len(collector.services) - 1
+    assert collector.generation == 1
+
+
+def test_services_without_health_url_are_skipped(tmp_path):
+    """A config entry missing health_url is skipped, not fatal."""
+    config = tmp_path / "services.yaml"
+    config.write_text(
+        "services:\n"
+        "  fks_api:\n"
+        "    health_url: http://fks-api:8001/health\n"
+        "  fks_broken:\n"
+        "    port: 9999\n"
+    )
+    collector = HealthCollector(services_config=str(config))
+
+    assert list(collector.services) == ["fks_api"]
+    assert collector.services["fks_api"]["live_url"] == "http://fks-api:8001/live"
+
+
+def test_collector_can_be_reused_across_event_loops(tmp_path):
+    """Loop-bound state is kept per loop, so a second loop probes normally."""
+    collector = HealthCollector(services_config=str(tmp_path / "missing.yaml"), max_concurrency=2)
+
+    async def update(status):
+        async def probe(session, url, kind):
+            await asyncio.sleep(0)
+            return {"status": status}
+
+        collector._probe = probe
+        await collector.update_all_health()
+        await collector.stop()
+        return collector.get_counts()
+
+    assert asyncio.run(update("dead"))["unhealthy"] == len(collector.services)
+    assert asyncio.run(update("alive"))["degraded"] == len(collector.services)
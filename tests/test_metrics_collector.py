@@ -0,0 +1,80 @@
+"""Metrics collector tests."""
+import time
+
+import pytest
+
+from src.services.metrics_collector import MetricsCollector
+
+
+def vector(*labels):
+    """Build a Prometheus instant-vector response."""
+    return {
+        "status": "success",
+        "data": {
+            "resultType": "vector",
+            "result": [{"metric": metric, "value": [0, "1"]} for metric in labels]
+        }
+    }
+
+
+@pytest.fixture
+def collector():
+    """Metrics collector answering every query from a fixed response."""
+    collector = MetricsCollector(prometheus_url="http://prometheus.invalid")
+
+    async def fake_fetch(query):
+        if "container_memory" in query:
+            return vector({"name": "fks-api"}, {"name": "fks-web"}, {"name": "cadvisor"})
+        if "http_requests_total" in query:
+            return vector({"service": "fks_api"})
+        return {}
+
+    collector.fetch_prometheus_metrics = fake_fetch
+    return collector
+
+
+@pytest.mark.asyncio
+async def test_service_metrics_are_indexed_by_label(collector):
+    """FKS series are grouped by their service/name/job label; others are not counted."""
+    await collector.fetch_all_metrics()
+
+    api = collector.get_service_metrics("fks-api")
+    assert list(api["metrics"]) == ["memory_usage"]
+    assert collector.get_service_metrics("fks_api")["metrics"]["http_requests_total"]
+    assert collector.get_service_metrics("fks_unknown")["metrics"] == {}
+    assert collector.get_counts() == {"services_with_metrics": 3, "total_metrics": 3}
+
+
+def test_service_metrics_before_first_fetch(collector):
+    """No metrics are reported before the first fetch."""
+    assert collector.get_service_metrics("fks-api") is None
+
+
+@pytest.mark.asyncio
+async def test_custom_queries_replace_defaults():
+    """Only the configured queries are fetched."""
+    collector = MetricsCollector(prometheus_url="http://prometheus.invalid", queries={"up": "up"})
+    seen = []
+
+    async def fake_fetch(query):
+        seen.append(query)
+        return vector({"job": "fks-api"})
+
+    collector.fetch_prometheus_metrics = fake_fetch
+    await collector.fetch_all_metrics()
+
+    assert seen == ["up"]
+    assert list(collector.get_all_metrics()["metrics"]) == ["up"]
+
+
+@pytest.mark.asyncio
+async def test_request_refresh_bypasses_query_cache():
+    """A requested refresh re-queries Prometheus even within the cache TTL."""
+    collector = MetricsCollector(prometheus_url="http://prometheus.invalid")
+    collector._store_query_result("up", time.monotonic(), vector({"job": "fks-api"}))
+    assert await collector.fetch_prometheus_metrics("up")
+
+    collector.request_refresh()
+
+    assert "up" not in collector._query_cache
+    await collector.stop()
@@ -0,0 +1,74 @@
+"""Test collector tests."""
+import asyncio
+import sys
+
+import pytest
+
+from src.services import test_collector
+
+
+@pytest.fixture
+def collector(tmp_path):
+    """Test collector without a services config."""
+    return test_collector.TestCollector(services_config=str(tmp_path / "missing.yaml"), test_timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_test_command_summary_is_parsed(collector):
+    """Counts are read from a pytest-style summary line; parsed failures mark it failing."""
+    collector.services = {
+        "fks_api": {
+            "test_command": [sys.executable, "-c", "print('== 4 passed, 1 failed in 0.1s ==')"]
+        }
+    }
+    await collector.update_all_tests()
+
+    result = collector.get_service_tests("fks_api")
+    assert result["status"] == "failing"
+    assert (result["total_tests"], result["passing_tests"], result["failing_tests"]) == (5, 4, 1)
+    assert collector.get_totals()["total_tests"] == 5
+
+
+@pytest.mark.asyncio
+async def test_test_command_must_be_a_list(collector):
+    """A test_command given as a single string is rejected, not run."""
+    collector.services = {"fks_api": {"test_command": "pytest -q"}}
+    await collector.update_all_tests()
+
+    result = collector.get_service_tests("fks_api")
+    assert result["status"] == "error"
+    assert "list" in result["error"]
+
+
+def test_test_results_with_bad_types_are_rejected():
+    """Non-numeric fields from a tests endpoint are refused instead of copied in."""
+    assert test_collector.parse_test_results({"total_tests": 3, "coverage": 81}) == {
+        "total_tests": 3,
+        "coverage": 81.0,
+    }
+    for bad in ({"coverage": None}, {"total_tests": "3"}, {"failing_tests": True}, []):
+        with pytest.raises(ValueError):
+            test_collector.parse_test_results(bad)
+
+
+@pytest.mark.asyncio
+async def test_totals_follow_each_published_result(collector):
+    """Totals and generation are updated with every result, not once per cycle."""
+    release = asyncio.Event()
+
+    async def check(service_name, service_config, ts=None):
+        if service_name == "fks_slow":
+            await release.wait()
+        return {"service": service_name, "total_tests": 2, "passing_tests": 2, "coverage": 0.0}
+
+    collector.check_service_tests = check
+    collector.services = {"fks_fast": {}, "fks_slow": {}}
+    update = asyncio.create_task(collector.update_all_tests())
+    await asyncio.sleep(0.01)
+
+    assert list(collector.get_all_tests()) == ["fks_fast"]
+    assert (collector.get_totals()["total_tests"], collector.generation) == (2, 1)
+
+    release.set()
+    await update
+    assert (collector.get_totals()["total_tests"], collector.generation) == (4, 2)